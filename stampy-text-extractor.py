@@ -1,31 +1,128 @@
 #!/usr/bin/env python3
+import bisect
+import html
 import json
+import mmap
 import os
 import shutil
-from dataclasses import dataclass
-from datetime import datetime
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import closing
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
 import requests
 from requests.auth import HTTPBasicAuth
 import argparse
 import re
 import sys
-from bs4 import BeautifulSoup
-from pathvalidate import sanitize_filename
-from typing import List, Union
+from selectolax.lexbor import LexborHTMLParser
+from typing import List, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # orjson has no PyPy build, fall back to the json module
+    orjson = None
+
+# http URLs
+URL_PATTERN = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
+# internal URLs
+STATE_URL_PATTERN = re.compile(r'\/\?state=[A-Za-z0-9]{4}&amp;question=[^"]+')
+EXTRA_NEWLINES_PATTERN = re.compile(r'\s*\n\s*\n\s*\n+')
+# a tag starts with a letter, '/', '!' or '?', and a '>' inside a quoted attribute value does not end it
+TAG_PATTERN = re.compile(r'''(<[A-Za-z/!?](?:[^>"']|"[^"]*"|'[^']*')*>)''')
+PRESERVE_WHITESPACE_TAG_PATTERN = re.compile(r'<(/?)(?:pre|textarea)\b', re.IGNORECASE)
+SKIPPED_CONTENT_TAG_PATTERN = re.compile(r'<(/?)(script|style)\b', re.IGNORECASE)
+NEWLINE_PATTERN = re.compile(r'\n')
+# characters that are not allowed in file names on Windows, plus control characters
+FORBIDDEN_FILENAME_CHARS = str.maketrans('', '', '<>:"/\\|?*' + ''.join(map(chr, range(32))))
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def json_loads(data):
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # orjson rejects lone surrogate escapes such as "\ud800", the json module accepts them
+    return json.loads(bytes(data))  # json.loads does not accept memoryviews
+
 
+def sanitize_filename(filename: str) -> str:
+    return filename.translate(FORBIDDEN_FILENAME_CHARS)[:200].rstrip('. ')
 
-def strip_tags(html_text):
-    if html_text is None:
+
+def _join_text_nodes(nodes) -> str:
+    """
+    Join (text, preserve_whitespace) nodes the way BeautifulSoup's get_text() does:
+    a node made only of ASCII whitespace becomes one newline (or one space when it
+    has no newline), except inside <pre> and <textarea>.
+    """
+    parts = []
+    for text, preserve_whitespace in nodes:
+        if not preserve_whitespace and not text.strip(' \t\n\r\f'):
+            text = '\n' if '\n' in text else ' '
+        parts.append(text)
+    return ''.join(parts)
+
+
+def _regex_text_nodes(html_text):
+    preserve_depth = 0
+    skipped_tag = None  # inside <script> or <style>, whose content get_text() leaves out
+    for i, piece in enumerate(TAG_PATTERN.split(html_text)):
+        if i % 2:  # odd pieces are the tags themselves
+            match = SKIPPED_CONTENT_TAG_PATTERN.match(piece)
+            if skipped_tag is not None:
+                if match and match.group(1) and match.group(2).lower() == skipped_tag:
+                    skipped_tag = None
+                continue
+            if match and not match.group(1):
+                skipped_tag = match.group(2).lower()
+                continue
+            match = PRESERVE_WHITESPACE_TAG_PATTERN.match(piece)
+            if match:
+                preserve_depth = max(preserve_depth - 1, 0) if match.group(1) else preserve_depth + 1
+        elif piece and skipped_tag is None:
+            yield piece, preserve_depth > 0
+
+
+def _lexbor_text_nodes(html_text):
+    root = LexborHTMLParser(html_text).root
+    if root is None:
+        return
+    for node in root.traverse(include_text=True):
+        if node.tag != '-text':
+            continue
+        parent, preserve_whitespace, skipped = node.parent, False, False
+        while parent is not None and not skipped:
+            preserve_whitespace = preserve_whitespace or parent.tag in ('pre', 'textarea')
+            skipped = parent.tag in ('script', 'style')
+            parent = parent.parent
+        if not skipped:
+            yield node.text_content, preserve_whitespace
+
+
+def strip_tags(html_text, strict_html=False):
+    """
+    Remove HTML tags and decode entities.
+    The default regex pass is enough for the site content; strict_html uses a real HTML parser.
+    """
+    if not html_text:
         return ""
-    soup = BeautifulSoup(html_text, 'html.parser')
-    return soup.get_text()
+    if strict_html:
+        return _join_text_nodes(_lexbor_text_nodes(html_text))
+    return html.unescape(_join_text_nodes(_regex_text_nodes(html_text)))
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Entry:
+    """
+    One article. Its text and URLs are only extracted from the raw HTML when first
+    accessed, or in bulk by load_entries.
+    """
     title: str
     pageid: str
-    text: str
+    rawtext: str
     answerEditLink: str
     tags: List[str]
     banners: List[str]
@@ -36,11 +133,51 @@ class Entry:
     parents: List[str]
     updatedAt: datetime
     order: int
-    URLs: str
-
-
-def download_json(local_file: str, status: str, password: str) -> dict:
-    """Download the JSON file from aisafety.info"""
+    text_only: bool = False
+    strict_html: bool = False
+    _processed: Optional[Tuple[str, List[str]]] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def text(self) -> str:
+        return self._load()[0]
+
+    @property
+    def URLs(self) -> List[str]:
+        return self._load()[1]
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._processed is not None
+
+    def _load(self) -> Tuple[str, List[str]]:
+        if self._processed is None:
+            self._set_processed(extract_text_and_urls(self.rawtext, self.text_only, self.strict_html))
+        return self._processed
+
+    def _set_processed(self, processed: Tuple[str, List[str]]):
+        object.__setattr__(self, '_processed', processed)
+
+
+@dataclass(slots=True)
+class EntryColumns:
+    """Column-wise copy of the entries, so the search scans plain lists instead of objects"""
+    titles: List[str]
+    texts: List[str]
+    urls: List[List[str]]
+    statuses: List[str]
+
+    @classmethod
+    def from_entries(cls, entries: List[Entry]) -> 'EntryColumns':
+        return cls(
+            titles=[entry.title for entry in entries],
+            texts=[entry.text for entry in entries],
+            urls=[entry.URLs for entry in entries],
+            statuses=[entry.status for entry in entries],
+        )
+
+
+def download_json(local_file: str, status: str, password: str):
+    """Download the JSON file from aisafety.info, streaming it straight to disk"""
     url = 'https://aisafety.info/questions/allQuestions'
     if not password:
         password = os.environ.get('STAMPY_PASSWORD')
@@ -50,15 +187,60 @@ def download_json(local_file: str, status: str, password: str) -> dict:
     auth = HTTPBasicAuth('stampy', password)  # the authentication is known to be weak
     params = {'dataType': 'singleFileJson', 'questions': status}
 
-    response = requests.get(url, auth=auth, params=params)
-    response.raise_for_status()
-    data = response.json()
-    with open(local_file, 'w') as file:
-        json.dump(data, file)
-    return data
+    tmp_file = local_file + '.tmp'
+    try:
+        with requests.get(url, auth=auth, params=params, stream=True) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True  # let urllib3 gunzip the body while copying
+            with open(tmp_file, 'wb') as file:
+                shutil.copyfileobj(response.raw, file)
+
+        # the body is not decoded here, at least make sure it is not an error or login page
+        with open(tmp_file, 'rb') as file:
+            start = file.read(4096).lstrip()
+        if start[:1] not in (b'[', b'{'):
+            print(f"Error: The server did not send JSON (it starts with {start[:50]!r}). Keeping the previous file.")
+            sys.exit(1)
+
+        os.replace(tmp_file, local_file)
+    finally:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def load_json_file(local_file: str):
+    """Decode the cached JSON file, reading it through a memory map instead of a read() copy"""
+    with open(local_file, 'rb') as file:
+        if os.fstat(file.fileno()).st_size == 0:  # empty files cannot be mapped
+            return json_loads(file.read())
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                mm.madvise(mmap.MADV_SEQUENTIAL)  # single forward pass, let the kernel read ahead
+            with memoryview(mm) as view:
+                return json_loads(view)
+
+
+def extract_text_and_urls(rawtext: Union[str, None], text_only: bool = False,
+                          strict_html: bool = False) -> Tuple[str, List[str]]:
+    """
+    Turn the raw HTML of one entry into its plain text and URLs.
+    The URLs come from C regex scans of the raw HTML. The text comes from strip_tags,
+    which loops over the text nodes in Python after a regex split or a lexbor parse.
+    """
+    if not rawtext:
+        return "", []
+    urls = [] if text_only else extract_urls(rawtext)
+    cleaned_text = strip_tags(rawtext, strict_html)
+
+    if text_only:
+        # Remove lines ending with ↩︎, they are footnotes
+        cleaned_text = '\n'.join(line for line in cleaned_text.split('\n') if not line.strip().endswith('↩︎'))
+        cleaned_text = EXTRA_NEWLINES_PATTERN.sub('\n\n', cleaned_text)  # Clean up extra newlines
+
+    return cleaned_text, urls
 
 
-def parse_json_data(content: List[dict], text_only: bool = False) -> List[Entry]:
+def parse_json_data(content: List[dict], text_only: bool = False, strict_html: bool = False) -> List[Entry]:
     """
     Convert the JSON data into a list of entries (articles).
     Only articles with relevant statuses are kept.
@@ -67,34 +249,28 @@ def parse_json_data(content: List[dict], text_only: bool = False) -> List[Entry]
 
     entries = []
     for item in content:
+        status = item.get('status', '')
+        if status in excluded_statuses:
+            continue
         try:
-            rawtext = item.get('text', '')
-            urls = [] if text_only else extract_urls(rawtext)
-            cleaned_text = strip_tags(rawtext)
-
-            if text_only:
-                # Remove lines ending with ↩︎, they are footnotes
-                cleaned_text = '\n'.join(line for line in cleaned_text.split('\n') if not line.strip().endswith('↩︎'))
-                cleaned_text = re.sub(r'\s*\n\s*\n\s*\n+', '\n\n', cleaned_text)  # Clean up extra newlines
-
             entry = Entry(
                 title=item.get('title', ''),
                 pageid=item.get('pageid', ''),
-                text=cleaned_text,
+                rawtext=item.get('text', ''),
                 answerEditLink=item.get('answerEditLink', ''),
                 tags=item.get('tags', []),
                 banners=item.get('banners', []),
                 relatedQuestions=item.get('relatedQuestions', []),
-                status=item.get('status', ''),
+                status=status,
                 alternatePhrasings=item.get('alternatePhrasings', ''),
                 subtitle=item.get('subtitle', ''),
                 parents=item.get('parents', []),
                 updatedAt=parse_datetime(item.get('updatedAt', '')),
                 order=item.get('order', 0),
-                URLs=urls
+                text_only=text_only,
+                strict_html=strict_html
             )
-            if entry.status not in excluded_statuses:
-                entries.append(entry)
+            entries.append(entry)
 
         except ValueError as e:
             print(f"Error parsing entry: {e}")
@@ -102,6 +278,26 @@ def parse_json_data(content: List[dict], text_only: bool = False) -> List[Entry]
     return entries
 
 
+def load_entries(entries: List[Entry]):
+    """Extract the text and URLs of the entries that are not loaded yet"""
+    pending = [entry for entry in entries if not entry.is_loaded]
+    # starting workers and shipping entries to them only pays off with several cores and a big batch
+    if (os.cpu_count() or 1) <= 1 or len(pending) < 256:
+        for entry in pending:
+            entry._load()
+        return
+
+    # HTML stripping is pure CPU work, spread it over all cores
+    with ProcessPoolExecutor() as executor:
+        processed = executor.map(extract_text_and_urls,
+                                 [entry.rawtext for entry in pending],
+                                 [entry.text_only for entry in pending],
+                                 [entry.strict_html for entry in pending],
+                                 chunksize=64)
+        for entry, result in zip(pending, processed):
+            entry._set_processed(result)
+
+
 def extract_urls(text: Union[str, None]) -> List[str]:
     if text is None:
         return []
@@ -113,54 +309,169 @@ def extract_urls(text: Union[str, None]) -> List[str]:
             print(f"Error converting text to string: {e}")
             return []
 
-    # http URLs
-    url_pattern = re.compile(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+')
-    # internal URLs
-    state_url_pattern = re.compile(r'\/\?state=[A-Za-z0-9]{4}&amp;question=[^"]+')
-
-    standard_urls = url_pattern.findall(text)
-    state_urls = state_url_pattern.findall(text)
-    return standard_urls + state_urls
+    return URL_PATTERN.findall(text) + STATE_URL_PATTERN.findall(text)
 
 
 def parse_datetime(date_string: str) -> datetime:
     if not date_string:
         return datetime.min
+    # fast path for the YYYY-MM-DDTHH:MM:SS[.fff]Z shape the site always sends
+    if (len(date_string) >= 20 and date_string[-1] == 'Z' and date_string[10] == 'T'
+            and (len(date_string) == 20 or date_string[19] == '.')):
+        fraction = date_string[20:-1]
+        return datetime(int(date_string[0:4]), int(date_string[5:7]), int(date_string[8:10]),
+                        int(date_string[11:13]), int(date_string[14:16]), int(date_string[17:19]),
+                        int(fraction.ljust(6, '0')[:6]) if fraction else 0)
     return datetime.fromisoformat(date_string.rstrip('Z'))
 
 
-def dump_entries(entries: List[Entry]):
-    """Extract entries into individual text files"""
+def _version_ns(entry: Entry) -> Optional[int]:
+    """The entry's updatedAt in nanoseconds since the epoch, the mtime its dumped file is stamped with"""
+    if entry.updatedAt == datetime.min:
+        return None
+    updated_at = entry.updatedAt
+    # the site sends UTC, naive values are UTC; aware ones are converted, not relabelled
+    if updated_at.tzinfo is None:
+        updated_at = updated_at.replace(tzinfo=timezone.utc)
+    else:
+        updated_at = updated_at.astimezone(timezone.utc)
+    return (updated_at - EPOCH) // timedelta(microseconds=1) * 1000
 
-    # remove all files in the "entries" folder
-    if os.path.exists('entries'):
-        shutil.rmtree('entries')
-    os.makedirs('entries')
 
-    nb_entries = 0
+def _entry_filename(entry: Entry) -> str:
+    safe_title = sanitize_filename(entry.title)
+    return f"entries/({entry.status})_{entry.pageid}_{safe_title}.txt"
 
-    for entry in entries:
-        safe_title = sanitize_filename(entry.title, platform='auto')
-        filename = f"entries/({entry.status})_{safe_title}.txt"
-        try:
-            with open(filename, 'w', encoding='utf-8') as file:
-                file.write(f"Title: {entry.title}\n\n")
-                file.write("URLs:\n")
-                for url in entry.URLs:
-                    file.write(f"- {url}\n")
-                file.write("\n")
-                file.write(entry.text)
-            nb_entries += 1
-        except OSError as e:
-            if e.errno == 36:  # File name too long
-                print(f"Error: File name too long for entry '{entry.title[:50]}...'. Skipping this entry.")
+
+def _write_entry(entry: Entry, filename: str) -> bool:
+    """
+    Write one entry to its text file, return whether it succeeded.
+    The file's mtime is set to the entry's updatedAt, so the next dump can tell which version it holds.
+    """
+    tmp_filename = None
+    try:
+        parts = [f"Title: {entry.title}\n\n", "URLs:\n"]
+        parts.extend(f"- {url}\n" for url in entry.URLs)
+        parts.append("\n")
+        parts.append(entry.text)
+        # a short temporary name: appending to a name near the length limit would fail.
+        # Each thread writes one file at a time, so the thread id keeps it unique.
+        tmp_filename = os.path.join(os.path.dirname(filename), f".{os.getpid()}_{threading.get_ident()}.tmp")
+        with open(tmp_filename, 'w', encoding='utf-8') as file:
+            file.write(''.join(parts))
+        version_ns = _version_ns(entry)
+        if version_ns is not None:
+            os.utime(tmp_filename, ns=(version_ns, version_ns))
+        os.replace(tmp_filename, filename)  # never leave a half-written entry behind
+        tmp_filename = None
+        return True
+    except OSError as e:
+        if e.errno == 36:  # File name too long
+            print(f"Error: File name too long for entry '{entry.title[:50]}...'. Skipping this entry.")
+        else:
+            print(f"Error writing file for entry '{entry.title[:50]}...': {str(e)}")
+        return False
+    finally:
+        if tmp_filename is not None and os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+
+
+def dump_entries(entries: List[Entry], options: str = ''):
+    """
+    Extract entries into individual text files.
+    Files whose mtime matches their entry's updatedAt are kept as they are, unless the
+    parsing options changed since the last dump. Entries without updatedAt are always rewritten.
+    """
+    filenames = [_entry_filename(entry) for entry in entries]
+    options_file = os.path.join('entries', '.options')
+
+    # remove the files in the "entries" folder that do not belong to an entry anymore
+    os.makedirs('entries', exist_ok=True)
+    kept = {os.path.basename(filename) for filename in filenames}
+    kept.add(os.path.basename(options_file))
+    mtimes = {}
+    with os.scandir('entries') as it:
+        for existing in it:
+            if existing.name in kept:
+                mtimes[existing.name] = existing.stat().st_mtime_ns
+            elif existing.is_dir(follow_symlinks=False):
+                shutil.rmtree(existing.path)
             else:
-                print(f"Error writing file for entry '{entry.title[:50]}...': {str(e)}")
+                os.remove(existing.path)
+
+    # the text of every entry depends on the options, a change invalidates all files
+    previous_options = None
+    if os.path.basename(options_file) in mtimes:
+        with open(options_file, 'r', encoding='utf-8') as file:
+            previous_options = file.read()
+    if previous_options != options:
+        mtimes = {}
+
+    to_write = []
+    for entry, filename in zip(entries, filenames):
+        # without updatedAt there is no way to tell whether the entry changed
+        version_ns = _version_ns(entry)
+        if version_ns is None or mtimes.get(os.path.basename(filename)) != version_ns:
+            to_write.append((entry, filename))
+    load_entries([entry for entry, _ in to_write])  # unchanged entries are never stripped
 
-    print(f"Dumped {nb_entries} entries to the 'entries' directory.")
+    # file writes release the GIL, overlap them with threads
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        nb_written = sum(executor.map(lambda job: _write_entry(*job), to_write))
 
+    with open(options_file, 'w', encoding='utf-8') as file:
+        file.write(options)
+
+    nb_unchanged = len(entries) - len(to_write)
+    print(f"Dumped {nb_written + nb_unchanged} entries to the 'entries' directory ({nb_unchanged} unchanged).")
+
+
+def open_search_index(index_file: str, entries: List[Entry], source_key: str) -> sqlite3.Connection:
+    """
+    Open the full-text index of the entries, rebuilding it when source_key changed.
+    The trigram tokenizer lets the index answer substring queries, not only whole tokens.
+    Entries are only loaded when the index has to be rebuilt.
+    """
+    conn = sqlite3.connect(index_file)
+    conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+    row = conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+    if row is None or row[0] != source_key:
+        load_entries(entries)
+        with conn:
+            conn.execute("DROP TABLE IF EXISTS entries")
+            conn.execute("CREATE VIRTUAL TABLE entries USING fts5(title, text, urls, tokenize='trigram')")
+            conn.executemany(
+                "INSERT INTO entries (rowid, title, text, urls) VALUES (?, ?, ?, ?)",
+                ((i, entry.title, entry.text, '\n'.join(entry.URLs)) for i, entry in enumerate(entries))
+            )
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('source', ?)", (source_key,))
+    return conn
 
-def search_entries(entries, search_term, case_sensitive=False, whole_word=False):
+
+def index_can_answer(search_term: str, case_sensitive: bool = False) -> bool:
+    """
+    Whether the index finds every entry the search regex matches.
+    Trigrams need at least 3 characters. The index folds case differently from
+    re.IGNORECASE outside ASCII, so case-insensitive searches for non-ASCII terms scan every entry.
+    """
+    return len(search_term) >= 3 and (case_sensitive or search_term.isascii())
+
+
+def search_candidates(conn: sqlite3.Connection, search_term: str, case_sensitive: bool = False) -> List[int]:
+    """
+    Indices of the entries that may contain the term, ignoring case and word boundaries.
+    Only valid when index_can_answer() is true for the term.
+    """
+    query = '"{}"'.format(search_term.replace('"', '""'))
+    sql = "SELECT rowid FROM entries WHERE entries MATCH ?"
+    if not case_sensitive:
+        # re.IGNORECASE matches 'i' with the Turkish 'İ' and 'ı', the index does not
+        sql += (" UNION SELECT rowid FROM entries"
+                " WHERE title GLOB '*[İı]*' OR text GLOB '*[İı]*' OR urls GLOB '*[İı]*'")
+    return [rowid for (rowid,) in conn.execute(sql + " ORDER BY rowid", (query,))]
+
+
+def search_entries(columns: EntryColumns, search_term, case_sensitive=False, whole_word=False):
     results = []
     flags = 0 if case_sensitive else re.IGNORECASE
 
@@ -168,27 +479,35 @@ def search_entries(entries, search_term, case_sensitive=False, whole_word=False)
         pattern = r'\b{}\b'.format(re.escape(search_term))
     else:
         pattern = re.escape(search_term)
+    pattern = re.compile(pattern, flags)
+    titles, texts, urls, statuses = columns.titles, columns.texts, columns.urls, columns.statuses
 
-    for entry in entries:
-        title_match = re.search(pattern, entry.title, flags=flags)
-        text_match = re.search(pattern, entry.text, flags=flags)
-        url_matches = [re.search(pattern, url, flags=flags) for url in entry.URLs]
+    for i in range(len(titles)):
+        title, text, entry_urls = titles[i], texts[i], urls[i]
+        title_match = pattern.search(title)
+        text_match = pattern.search(text)
+        url_matches = [pattern.search(url) for url in entry_urls]
 
         if title_match or text_match or any(url_matches):
             result = {
-                'title': entry.title,
-                'status': entry.status,
+                'title': title,
+                'status': statuses[i],
                 'matches': []
             }
 
             if title_match:
                 result['matches'].append(('title', title_match.start(), title_match.group()))
 
-            for line_num, line in enumerate(entry.text.split('\n'), 1):
-                for match in re.finditer(pattern, line, flags=flags):
-                    result['matches'].append(('text', match.group(), line.strip()))
+            if text_match:
+                # scan the whole text once, then map each match back to its line
+                newlines = [match.start() for match in NEWLINE_PATTERN.finditer(text)]
+                for match in pattern.finditer(text):
+                    line_idx = bisect.bisect_left(newlines, match.start())
+                    line_start = newlines[line_idx - 1] + 1 if line_idx else 0
+                    line_end = newlines[line_idx] if line_idx < len(newlines) else len(text)
+                    result['matches'].append(('text', match.group(), text[line_start:line_end].strip()))
 
-            for url, url_match in zip(entry.URLs, url_matches):
+            for url, url_match in zip(entry_urls, url_matches):
                 if url_match:
                     result['matches'].append(('url', url_match.group(), url))
 
@@ -205,6 +524,7 @@ def main():
                         help='Select which status of questions to include (default: all)')
     parser.add_argument('--password', required=False, help='Password for authentication', default='')
     parser.add_argument('--text-only', action='store_true', help='Discards URLs and footnotes')
+    parser.add_argument('--strict-html', action='store_true', help='Strip HTML with a full parser instead of a regex')
 
     parser.add_argument('--search', help='Search for a specific term in titles and text')
     parser.add_argument('--case-sensitive', action='store_true', help='Make the search case-sensitive')
@@ -212,16 +532,35 @@ def main():
     args = parser.parse_args()
 
     local_file = 'stampy_text_html.json'
+    index_file = 'stampy_text_index.db'
     if args.refresh or not os.path.exists(local_file):
-        json_data = download_json(local_file, args.status, args.password)
-    else:
-        with open(local_file, 'r') as file:
-            json_data = json.load(file)
+        download_json(local_file, args.status, args.password)
+
+    if not (args.search or args.dump):
+        return
+
+    json_data = load_json_file(local_file)
 
-    entries = parse_json_data(json_data, args.text_only)
+    entries = parse_json_data(json_data, args.text_only, args.strict_html)
+    options = f"text_only={args.text_only} strict_html={args.strict_html}"
 
     if args.search:
-        search_results = search_entries(entries, args.search, args.case_sensitive, args.whole_word)
+        candidates = None
+        if index_can_answer(args.search, args.case_sensitive):
+            source = os.stat(local_file)
+            try:
+                with closing(open_search_index(index_file, entries,
+                                               f"{source.st_mtime_ns} {source.st_size} {options}")) as conn:
+                    candidates = search_candidates(conn, args.search, args.case_sensitive)
+            except (sqlite3.Error, UnicodeEncodeError):
+                # SQLite older than 3.34 or built without FTS5 has no trigram tokenizer, and lone
+                # surrogates cannot be stored: scan every entry instead
+                candidates = None
+        # only the candidate entries need their HTML stripped
+        searched = entries if candidates is None else [entries[i] for i in candidates]
+        load_entries(searched)
+        search_results = search_entries(EntryColumns.from_entries(searched), args.search,
+                                        args.case_sensitive, args.whole_word)
         if search_results:
             for result in search_results:
                 print()
@@ -236,7 +575,7 @@ def main():
             print("No matches found.")
 
     if args.dump:
-        dump_entries(entries)
+        dump_entries(entries, options)
 
 
 if __name__ == "__main__":